@@ -2,9 +2,10 @@
 
 import wx
 import wx.lib.ogl as ogl
-import time
-import thread
 import random
+import os
+import hashlib
+import pickle
 
 import sys
 sys.path.append("../../src/")
@@ -19,37 +20,87 @@ from data_testgraphs import *
 
 UNIT_TESTING_MODE = True
 
+# (low, high) for the random id number, duplicate id suffix, left, top, width
+# and height of a node made by InsertNewNode()
+NEW_NODE_RANDOM_RANGES = ((1, 99), (1, 9999), (0, 100), (0, 100), (60, 160), (60, 160))
+
+# shape.cached_bbox is GetBoundingBoxMax() remembered when the shape is made
+# or resized, saves asking ogl for it every time a shape is positioned
 def setpos(shape, x, y):
-    width, height = shape.GetBoundingBoxMax()
+    width, height = shape.cached_bbox
     shape.SetX( x + width/2 )
     shape.SetY( y + height/2 )
 def getpos(shape):
-    width, height = shape.GetBoundingBoxMax()
+    width, height = shape.cached_bbox
     x = shape.GetX()
     y = shape.GetY()
     return (x - width/2, y - height/2)
 
+# Layout cache - spring layout positions remembered on disk, keyed on the graph
+# structure (node ids and edges, which is all the spring layout looks at) so
+# that the same graph doesn't need laying out again next session.  Only the
+# boot graph built in AppFrame uses it, saved graphs carry their own x,y.
+
+LAYOUT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".pynsource_layoutcache")
+
+def layout_cache_filename(graph):
+    structure = [node.id for node in graph.nodes]
+    structure += ["%s>%s:%s" % (edge['source'].id, edge['target'].id, edge.get('weight', 1)) for edge in graph.edges]
+    key = hashlib.md5("\n".join(structure)).hexdigest()[:16]
+    return os.path.join(LAYOUT_CACHE_DIR, key + ".pkl")
+
+def load_cached_layout(graph):
+    filename = layout_cache_filename(graph)
+    if not os.path.exists(filename):
+        return False
+    try:
+        fp = open(filename, "rb")
+        positions = pickle.load(fp)
+        fp.close()
+        # Look every node up before touching any, a stale or foreign file can
+        # be missing nodes or hold something other than (x, y) pairs
+        points = [(node, float(positions[node.id][0]), float(positions[node.id][1])) for node in graph.nodes]
+    except Exception:
+        print "Layout cache file %s unreadable, ignoring it" % filename
+        return False
+    for node, x, y in points:
+        node.layoutPosX, node.layoutPosY = x, y
+    GraphLayoutSpring(graph).layoutCalcBounds()
+    return True
+
+def save_cached_layout(graph):
+    positions = dict((node.id, (node.layoutPosX, node.layoutPosY)) for node in graph.nodes)
+    try:
+        if not os.path.exists(LAYOUT_CACHE_DIR):
+            os.makedirs(LAYOUT_CACHE_DIR)
+        fp = open(layout_cache_filename(graph), "wb")
+        pickle.dump(positions, fp)
+        fp.close()
+    except (IOError, OSError):
+        print "Couldn't write layout cache to", LAYOUT_CACHE_DIR
+
 class MyEvtHandler(ogl.ShapeEvtHandler):
-    def __init__(self, log, oglcanvas):
+    def __init__(self, log, oglcanvas, renderer):
         ogl.ShapeEvtHandler.__init__(self)
         self.log = log
         self.oglcanvas = oglcanvas
+        # one handler per shape, so look these up once rather than every event
+        self.frame = oglcanvas.GetTopLevelParent()
+        self.renderer = renderer
 
     def UpdateStatusBar(self, shape):
-        x, y = shape.GetX(), shape.GetY()
         x, y = getpos(shape)
-        width, height = shape.GetBoundingBoxMax()
-        frame = self.oglcanvas.GetTopLevelParent()
-        frame.SetStatusText("Pos: (%d,%d)  Size: (%d, %d)  -  GraphNode is %s" % (x, y, width, height, shape.node))
+        width, height = shape.cached_bbox
+        self.frame.SetStatusText("Pos: (%d,%d)  Size: (%d, %d)  -  GraphNode is %s" % (x, y, width, height, shape.node))
 
     def OnLeftClick(self, x, y, keys = 0, attachment = 0):
         #print "OnLeftClick"
         shape = self.GetShape()
         
         # size handles
-        shape.GetCanvas().graphrendererogl.DeselectAllShapes()
+        self.renderer.DeselectAllShapes()
         shape.Select(True, None)
-        shape.GetCanvas().graphrendererogl.stateofthenation()
+        self.renderer.stateofthenation()
         
         self.UpdateStatusBar(shape)
             
@@ -57,7 +108,7 @@ class MyEvtHandler(ogl.ShapeEvtHandler):
         ogl.ShapeEvtHandler.OnDrawOutline(self, dc, x, y, w, h)
         shape = self.GetShape()
         x,y = (x - w/2, y - h/2) # correct to be top corner not centre
-        frame.SetStatusText("Pos: (%d,%d)  Size: (%d, %d)  -  GraphNode is %s" % (x, y, w, h, shape.node))
+        self.frame.SetStatusText("Pos: (%d,%d)  Size: (%d, %d)  -  GraphNode is %s" % (x, y, w, h, shape.node))
         
     def OnDragLeft(self, draw, x, y, keys = 0, attachment = 0):
         ogl.ShapeEvtHandler.OnDragLeft(self, draw, x, y, keys = 0, attachment = 0)
@@ -78,17 +129,16 @@ class MyEvtHandler(ogl.ShapeEvtHandler):
         
         # Adjust the GraphNode to match the shape x,y
         shape.node.left, shape.node.top = newpos
+        self.renderer.PositionsChanged()
 
         self.UpdateStatusBar(shape)
 
-        wx.SafeYield()
-        time.sleep(0.2)
-        
+        # don't hold up the end of the drag, let wx finish handling it first
         KEY_SHIFT, KEY_CTRL = 1, 2
         if keys & KEY_SHIFT:
-            shape.GetCanvas().graphrendererogl.stateofthenation()
+            wx.CallAfter(self.renderer.stateofthenation)
         else:
-            shape.GetCanvas().graphrendererogl.stage2()
+            wx.CallAfter(self.renderer.stage2)
 
     def OnSizingEndDragLeft(self, pt, x, y, keys, attch):
         shape = self.GetShape()
@@ -97,18 +147,17 @@ class MyEvtHandler(ogl.ShapeEvtHandler):
         ogl.ShapeEvtHandler.OnSizingEndDragLeft(self, pt, x, y, keys, attch)
         
         width, height = shape.GetBoundingBoxMin()
+        shape.cached_bbox = shape.GetBoundingBoxMax()
         print shape.node, "resized to", width, height
         #print shape.node.id, shape.node.left, shape.node.top, "resized to", width, height
         # Adjust the GraphNode to match the shape x,y
         shape.node.width, shape.node.height = width, height
         shape.node.left, shape.node.top = getpos(shape)
+        self.renderer.PositionsChanged()
         
-        self.UpdateStatusBar(self.GetShape())
+        self.UpdateStatusBar(shape)
 
-        wx.SafeYield()
-        time.sleep(0.2)
-        
-        shape.GetCanvas().graphrendererogl.stage2()
+        wx.CallAfter(self.renderer.stage2)
         
 class GraphShapeCanvas(ogl.ShapeCanvas):
     scrollStepX = 10
@@ -117,6 +166,17 @@ class GraphShapeCanvas(ogl.ShapeCanvas):
 
     def __init__(self, parent):
         ogl.ShapeCanvas.__init__(self, parent)
+        self.SetBackgroundStyle(wx.BG_STYLE_CUSTOM)  # OnPaint does all the background painting
+
+    def OnPaint(self, evt):  # Override of ShapeCanvas method
+        # Draw into an off screen buffer which gets blitted in one go, so a
+        # full repaint doesn't flicker
+        dc = wx.AutoBufferedPaintDC(self)
+        self.PrepareDC(dc)
+        dc.SetBackground(wx.Brush(self.GetBackgroundColour(), wx.SOLID))
+        dc.Clear()
+        if self.GetDiagram():
+            self.GetDiagram().Redraw(dc)
 
     def OnLeftClick(self, x, y, keys):  # Override of ShapeCanvas method
         # keys is a bit list of the following: KEY_SHIFT  KEY_CTRL
@@ -144,12 +204,20 @@ class GraphRendererOgl:
         self.oglcanvas.Bind(wx.EVT_CHAR, self.onKeyChar)
         self.oglcanvas.Bind(wx.EVT_SIZE, self.OnResizeFrame)
         
-        self.popupmenu = None
-        self.need_abort = False
+        self.BuildPopupMenu()
         self.new_edge_from = None
         self.working = False
         self.snapshot_mgr = GraphSnapshotMgr(graph=self.graph, umlcanvas=self)
 
+        # stage2 (overlap removal) is coalesced - see stage2()
+        self._stage2_pending = None
+        self._stage2_force_stateofthenation = False
+        self._stage2_watch_removals = True
+        self._stage2_report_stats = False
+        self._pos_epoch = 0     # bumped whenever node positions change
+        self._last_epoch = -1   # the _pos_epoch the last overlap removal pass ran against
+        self._last_found_overlaps = False   # what that pass found
+
         if UNIT_TESTING_MODE:
             self.overlap_remover = OverlapRemoval(self.graph, margin=5, gui=self)
         else:
@@ -177,13 +245,15 @@ class GraphRendererOgl:
             canvas.Refresh(False)   # Need this or else Control points ('handles') leave blank holes      
 
     def InsertNewNode(self):
-        id = 'D' + str(random.randint(1,99))
+        # draw everything random up front, in one go
+        suggested, suffix, left, top, width, height = [random.randint(lo, hi) for lo, hi in NEW_NODE_RANDOM_RANGES]
+        id = 'D' + str(suggested)
         dialog = wx.TextEntryDialog ( None, 'Enter an id string:', 'Create a new node', id )
         if dialog.ShowModal() == wx.ID_OK:
             id = dialog.GetValue()
             if self.graph.FindNodeById(id):
-                id += str(random.randint(1,9999))
-            node = GraphNode(id, random.randint(0, 100),random.randint(0,100),random.randint(60, 160),random.randint(60,160))
+                id += str(suffix)
+            node = GraphNode(id, left, top, width, height)
             node = self.graph.AddNode(node)
             self.createNodeShape(node)
             node.shape.Show(True)
@@ -244,8 +314,7 @@ class GraphRendererOgl:
         self.working = True
 
         if event.GetWheelRotation() < 0:
-            self.stage2()
-            print self.overlap_remover.GetStats()
+            self.stage2(report_stats=True)
         else:
             self.stateofthenation()
 
@@ -365,11 +434,8 @@ class GraphRendererOgl:
         
     def draw(self, translatecoords=True):
         self.stage1(translatecoords=translatecoords)
-        #thread.start_new_thread(self.DoSomeLongTask, ())
 
     def stage1(self, translatecoords=True):
-        import time
-        
         if translatecoords:
             self.AllToWorldCoords()
 
@@ -380,18 +446,77 @@ class GraphRendererOgl:
 
         self.Redraw()
 
-    def stage2(self, force_stateofthenation=False, watch_removals=True):
+    def PositionsChanged(self):
+        self._pos_epoch += 1
+
+    def stage2(self, force_stateofthenation=False, watch_removals=True, report_stats=False, defer=True):
+        """
+        Schedules an overlap removal pass rather than doing it now, so that a
+        burst of requests (mouse wheel ticks, drags, key repeats) results in a
+        single pass once things settle.  Options of coalesced requests are
+        merged.  Callers which look at the result straight afterwards pass
+        defer=False to have the pass done there and then.
+        """
+        if not defer:
+            self._stage2(force_stateofthenation, watch_removals, report_stats)
+            return
+        self._stage2_force_stateofthenation |= force_stateofthenation
+        self._stage2_watch_removals &= watch_removals
+        self._stage2_report_stats |= report_stats
+        if self._stage2_pending:
+            return
+        self._stage2_pending = wx.CallLater(30, self._do_stage2)
+
+    def _do_stage2(self):
+        if self.working:
+            # Busy with a key or wheel action (which can yield to us), try
+            # again once it's finished
+            self._stage2_pending = wx.CallLater(30, self._do_stage2)
+            return
+        force_stateofthenation = self._stage2_force_stateofthenation
+        watch_removals = self._stage2_watch_removals
+        report_stats = self._stage2_report_stats
+        self._stage2_pending = None
+        self._stage2_force_stateofthenation = False
+        self._stage2_watch_removals = True
+        self._stage2_report_stats = False
+
+        self.working = True
+        self._stage2(force_stateofthenation, watch_removals, report_stats)
+        self.working = False
+
+    def _stage2(self, force_stateofthenation, watch_removals, report_stats):
+        # Nothing has moved since the last pass, so it would find the same result
+        if self._pos_epoch == self._last_epoch and not force_stateofthenation:
+            if report_stats:
+                self.ReportStage2Stats(self._last_found_overlaps)
+            return
+
         ANIMATION = False
         
         if ANIMATION:
             self.graph.SaveOldPositionsForAnimationPurposes()
             watch_removals = False  # added this when I turned animation on.
         
-        self.overlap_remover.RemoveOverlaps(watch_removals=watch_removals)
-        if self.overlap_remover.GetStats()['total_overlaps_found'] > 0 or force_stateofthenation:
+        # Most passes find nothing to do, don't pay for a full removal pass then
+        found_overlaps = self.overlap_remover.AnyOverlap()
+        if found_overlaps:
+            self.overlap_remover.RemoveOverlaps(watch_removals=watch_removals)
+        if found_overlaps or force_stateofthenation:
             self.stateofthenation(animate=ANIMATION)
+        self._last_epoch = self._pos_epoch  # our own moves don't need another pass
+        self._last_found_overlaps = found_overlaps
+        if report_stats:
+            self.ReportStage2Stats(found_overlaps)
+
+    def ReportStage2Stats(self, found_overlaps):
+        if found_overlaps:
+            print self.overlap_remover.GetStats()
+        else:
+            print "No Overlaps found at all."
         
     def stateofthenation(self, animate=False, recalibrate=False):
+        self.PositionsChanged()
         if recalibrate:  # was stateofthespring
             self.coordmapper.Recalibrate()
             self.AllToWorldCoords()
@@ -410,12 +535,19 @@ class GraphRendererOgl:
                     #node.shape.Move(dc, x, y, True) # don't do this or it will flicker
                     setpos(node.shape, x, y)
                     node.shape.MoveLinks(dc)
-                    self.Redraw(clear=False)
                 self.Redraw()
             
         else:
+            # One dc for the whole batch, and only move the links once every
+            # shape is in its final position.
+            dc = wx.ClientDC(self.oglcanvas)
+            self.oglcanvas.PrepareDC(dc)
+            self.oglcanvas.Freeze()
             for node in self.graph.nodes:
-                self.AdjustShapePosition(node)
+                setpos(node.shape, node.left, node.top)
+            for node in self.graph.nodes:
+                node.shape.MoveLinks(dc)
+            self.oglcanvas.Thaw()
             self.Redraw()
             wx.SafeYield()
         
@@ -431,7 +563,8 @@ class GraphRendererOgl:
         self.AllToWorldCoords()
         numoverlaps = self.overlap_remover.CountOverlaps()
         if removeoverlaps:
-            self.stage2(force_stateofthenation=True, watch_removals=False) # does overlap removal and stateofthenation
+            # Done straight away, the arrow key handlers report on the result
+            self.stage2(force_stateofthenation=True, watch_removals=False, defer=False) # does overlap removal and stateofthenation
         else:
             self.stateofthenation()
         
@@ -444,41 +577,17 @@ class GraphRendererOgl:
         self.AllToWorldCoords()
         self.stage2() # does overlap removal and stateofthenation
         
-    def AdjustShapePosition(self, node, point=None):
-        assert node.shape
-        
-        if point:
-            x, y = point
-        else:
-            x, y = node.left, node.top
-            
-        # Don't need to use node.shape.Move(dc, x, y, False)
-        setpos(node.shape, x, y)
-
-        # But you DO need to use a dc to adjust the links
-        dc = wx.ClientDC(self.oglcanvas)
-        self.oglcanvas.PrepareDC(dc)
-        node.shape.MoveLinks(dc)
-        
-    def Redraw(self, clear=True):
-        diagram = self.oglcanvas.GetDiagram()
-        canvas = self.oglcanvas
-        assert canvas == diagram.GetCanvas()
-
-        dc = wx.ClientDC(canvas)
-        canvas.PrepareDC(dc)
-        
-        #for node in self.graph.nodes:    # TODO am still moving nodes in the pynsourcegui version?
-        #    shape = node.shape
-        #    shape.Move(dc, shape.GetX(), shape.GetY())
-        
-        if clear:
-            diagram.Clear(dc)
-        diagram.Redraw(dc)
+    def Redraw(self):
+        # The canvas paints the diagram through a buffer (see
+        # GraphShapeCanvas.OnPaint) so just invalidate it, and paint now
+        # rather than whenever the event loop gets round to it.
+        self.oglcanvas.Refresh(False)
+        self.oglcanvas.Update()
      
     def createNodeShape(self, node):
         shape = ogl.RectangleShape( node.width, node.height )
         shape.AddText(node.id)
+        shape.cached_bbox = shape.GetBoundingBoxMax()
         setpos(shape, node.left, node.top)
         #shape.SetDraggable(True, True)
         self.oglcanvas.AddShape( shape )
@@ -486,7 +595,7 @@ class GraphRendererOgl:
         shape.node = node
         
         # wire in the event handler for the new shape
-        evthandler = MyEvtHandler(None, self.oglcanvas)
+        evthandler = MyEvtHandler(None, self.oglcanvas, self)
         evthandler.SetShape(shape)
         evthandler.SetPreviousHandler(shape.GetEventHandler())
         shape.SetEventHandler(evthandler)
@@ -504,57 +613,57 @@ class GraphRendererOgl:
         self.oglcanvas.GetDiagram().AddShape(line)
         line.Show(True)
         
-    def OnRightButtonMenu(self, event):   # Menu
-        x, y = event.GetPosition()
-        frame = self.oglcanvas.GetTopLevelParent()
-        
-        if self.popupmenu:
-            self.popupmenu.Destroy()    # wx.Menu objects need to be explicitly destroyed (e.g. menu.Destroy()) in this situation. Otherwise, they will rack up the USER Objects count on Windows; eventually crashing a program when USER Objects is maxed out. -- U. Artie Eoff  http://wiki.wxpython.org/index.cgi/PopupMenuOnRightClick
+    def BuildPopupMenu(self):
+        # Built and bound once, then reused for every right click.  The menu
+        # pops up over the canvas, so its events are bound on the canvas too.
+        canvas = self.oglcanvas
         self.popupmenu = wx.Menu()     # Create a menu
         
         item = self.popupmenu.Append(2015, "Load Graph from text...")
-        frame.Bind(wx.EVT_MENU, self.OnLoadGraphFromText, item)
+        canvas.Bind(wx.EVT_MENU, self.OnLoadGraphFromText, item)
         
         item = self.popupmenu.Append(2017, "Dump Graph to console")
-        frame.Bind(wx.EVT_MENU, self.OnSaveGraphToConsole, item)
+        canvas.Bind(wx.EVT_MENU, self.OnSaveGraphToConsole, item)
 
         self.popupmenu.AppendSeparator()
 
         item = self.popupmenu.Append(2011, "Load Graph...")
-        frame.Bind(wx.EVT_MENU, self.OnLoadGraph, item)
+        canvas.Bind(wx.EVT_MENU, self.OnLoadGraph, item)
         
         item = self.popupmenu.Append(2012, "Save Graph...")
-        frame.Bind(wx.EVT_MENU, self.OnSaveGraph, item)
+        canvas.Bind(wx.EVT_MENU, self.OnSaveGraph, item)
 
         self.popupmenu.AppendSeparator()
 
         imp = wx.Menu()
-        item = imp.Append(2021, "Load Test Graph 1"); frame.Bind(wx.EVT_MENU, self.OnLoadTestGraph1, item)
-        item = imp.Append(2022, "Load Test Graph 2"); frame.Bind(wx.EVT_MENU, self.OnLoadTestGraph2, item)
-        item = imp.Append(2023, "Load Test Graph 3"); frame.Bind(wx.EVT_MENU, self.OnLoadTestGraph3, item)
-        item = imp.Append(2043, "Load Test Graph 3a"); frame.Bind(wx.EVT_MENU, self.OnLoadTestGraph3a, item)
-        item = imp.Append(2024, "Load Test Graph 4"); frame.Bind(wx.EVT_MENU, self.OnLoadTestGraph4, item)
-        item = imp.Append(2025, "Load Test Graph 6 (line overlaps)"); frame.Bind(wx.EVT_MENU, self.OnLoadTestGraph6, item)
-        item = imp.Append(2026, "Load Test Graph 7"); frame.Bind(wx.EVT_MENU, self.OnLoadTestGraph7, item)
-        item = imp.Append(2046, "Load Test Graph 8 (up snug)"); frame.Bind(wx.EVT_MENU, self.OnLoadTestGraph8, item)
+        item = imp.Append(2021, "Load Test Graph 1"); canvas.Bind(wx.EVT_MENU, self.OnLoadTestGraph1, item)
+        item = imp.Append(2022, "Load Test Graph 2"); canvas.Bind(wx.EVT_MENU, self.OnLoadTestGraph2, item)
+        item = imp.Append(2023, "Load Test Graph 3"); canvas.Bind(wx.EVT_MENU, self.OnLoadTestGraph3, item)
+        item = imp.Append(2043, "Load Test Graph 3a"); canvas.Bind(wx.EVT_MENU, self.OnLoadTestGraph3a, item)
+        item = imp.Append(2024, "Load Test Graph 4"); canvas.Bind(wx.EVT_MENU, self.OnLoadTestGraph4, item)
+        item = imp.Append(2025, "Load Test Graph 6 (line overlaps)"); canvas.Bind(wx.EVT_MENU, self.OnLoadTestGraph6, item)
+        item = imp.Append(2026, "Load Test Graph 7"); canvas.Bind(wx.EVT_MENU, self.OnLoadTestGraph7, item)
+        item = imp.Append(2046, "Load Test Graph 8 (up snug)"); canvas.Bind(wx.EVT_MENU, self.OnLoadTestGraph8, item)
         self.popupmenu.AppendMenu(-1, 'Unit Test Graphs', imp)
 
         imp = wx.Menu()
-        item = imp.Append(2031, "Spring 2"); frame.Bind(wx.EVT_MENU, self.OnLoadSpring2, item)
-        item = imp.Append(2032, "Spring 3"); frame.Bind(wx.EVT_MENU, self.OnLoadSpring3, item)
+        item = imp.Append(2031, "Spring 2"); canvas.Bind(wx.EVT_MENU, self.OnLoadSpring2, item)
+        item = imp.Append(2032, "Spring 3"); canvas.Bind(wx.EVT_MENU, self.OnLoadSpring3, item)
         imp.AppendSeparator()
-        item = imp.Append(2033, "Initial Boot"); frame.Bind(wx.EVT_MENU, self.OnLoadInitialBoot, item)
+        item = imp.Append(2033, "Initial Boot"); canvas.Bind(wx.EVT_MENU, self.OnLoadInitialBoot, item)
         self.popupmenu.AppendMenu(-1, 'Other Test Graphs', imp)
 
         self.popupmenu.AppendSeparator()
 
         item = self.popupmenu.Append(2014, "Clear")
-        frame.Bind(wx.EVT_MENU, self.OnClear, item)  # must pass item
+        canvas.Bind(wx.EVT_MENU, self.OnClear, item)  # must pass item
 
         item = self.popupmenu.Append(2013, "Cancel")
-        #frame.Bind(wx.EVT_MENU, self.OnPopupItemSelected, item)
-        
-        frame.PopupMenu(self.popupmenu, wx.Point(x,y))
+        #canvas.Bind(wx.EVT_MENU, self.OnPopupItemSelected, item)
+
+    def OnRightButtonMenu(self, event):   # Menu
+        x, y = event.GetPosition()
+        self.oglcanvas.PopupMenu(self.popupmenu, wx.Point(x,y))
 
     def OnLoadTestGraph1(self, event):
         self.LoadGraph(TEST_GRAPH1)
@@ -630,7 +739,8 @@ class GraphRendererOgl:
         
         self.graph.LoadGraphFromStrings(filedata)
                 
-        # build view from model
+        # build view from model - persisted graphs carry their own x,y so no
+        # spring layout or layout to world coord translation is needed
         self.draw(translatecoords=False)
 
         # set layout coords to be in sync with world, so that if expand scale things will work
@@ -653,31 +763,6 @@ class GraphRendererOgl:
         # clear model
         self.graph.Clear()
         
-    def DoSomeLongTask(self):
-        
-        for i in range(1,50):
-            if self.need_abort:
-                print "aborted."
-                return
-            wx.CallAfter(self.stage2)
-            #print '*',
-            #wx.CallAfter(self.DoStuff)
-            time.sleep(2)   # lets events through to the main wx thread and paints/messages get through ok
-        print "Done."
-        
-        """
-        print "Task started"
-        if self.need_abort:
-            print "aborted."
-            return
-        wx.CallAfter(self.stage1)
-        #time.sleep(0.5)   # lets events through to the main wx thread and paints/messages get through ok
-        #wx.CallAfter(self.stage2)
-        print "Done."
-        """
-        
- 
-        
 
 class AppFrame(wx.Frame):
     def __init__(self):
@@ -737,8 +822,10 @@ class AppFrame(wx.Frame):
         g.AddEdge(b2, c5)
         g.AddEdge(a, c5)
 
-        layouter = GraphLayoutSpring(g)
-        layouter.layout()
+        if not load_cached_layout(g):
+            layouter = GraphLayoutSpring(g)
+            layouter.layout()
+            save_cached_layout(g)
         
         #for node in g.nodes:
         #    print node.id, (node.layoutPosX, node.layoutPosY)
@@ -32,11 +32,18 @@ class GraphLayoutSpring:
         memento1 = self.graph.GetMementoOfLayoutPoints()
         break_pending = 0
         
-        for i in range(0, self.iterations):
-            self.layoutIteration()
+        # Iterations are run in batches between the points where we need to
+        # look at the nodes (gui refresh and convergence checks, i.e. after
+        # iteration 0, 20, 40...) so that the kernel loop runs uninterrupted.
+        self.layoutSyncToArrays()
+        done = 0
+        for i in range(0, self.iterations, 20):
+            self.layoutIterations(i + 1 - done)
+            done = i + 1
 
             if i%100==0: # i%50==0:
                 if self.gui:
+                    self.layoutSyncFromArrays()
                     self.layoutCalcBounds()         # this is the only time you need to call this explicitly since are in the MIDDLE of a layout and about to visualise
                     self.gui.stateofthenation(recalibrate=True, auto_resize_canvas=False) # refresh gui
                     
@@ -46,6 +53,7 @@ class GraphLayoutSpring:
 
             if i%20==0:
                 if optimise:
+                    self.layoutSyncFromArrays()
                     memento2 = self.graph.GetMementoOfLayoutPoints()
                     if Graph.MementosEqual(memento1, memento2, 0.01):
                         break_pending += 1
@@ -57,8 +65,11 @@ class GraphLayoutSpring:
                         break_pending = 0
                         #print ".",
                     memento1 = memento2
+        else:
+            self.layoutIterations(self.iterations - done)  # the leftover tail of iterations
 
         #print
+        self.layoutSyncFromArrays()
         self.layoutCalcBounds()
        
     def layoutPrepare(self):
@@ -88,74 +99,140 @@ class GraphLayoutSpring:
         self.graph.layoutMinY = miny
         self.graph.layoutMaxY = maxy
        
-    def layoutIteration(self):
-        # Forces on nodes due to node-node repulsions
-        for i in range(0, len(self.graph.nodes)):
-            node1 = self.graph.nodes[i];
-            for j in range(i + 1, len(self.graph.nodes)):
-                node2 = self.graph.nodes[j]
-                self.layoutRepulsive(node1, node2)
-        # Forces on nodes due to edge attractions
+    def layoutSyncToArrays(self):
+        """
+        Pack the per node layout attributes into parallel lists (one list per
+        attribute, indexed by node position in graph.nodes) so that the
+        iteration loops work on plain local floats rather than doing attribute
+        lookups on every node for every pair.  Call layoutSyncFromArrays() to
+        push the results back into the nodes.
+
+        Edges likewise become parallel lists of source and target node
+        positions plus the strength each edge's weight adds to its attraction.
+        """
+        nodes = self.graph.nodes
+        self.posX = [node.layoutPosX for node in nodes]
+        self.posY = [node.layoutPosY for node in nodes]
+        self.forceX = [node.layoutForceX for node in nodes]
+        self.forceY = [node.layoutForceY for node in nodes]
+
+        nodeIndex = dict((node, i) for i, node in enumerate(nodes))
+        self.edgeSource = []
+        self.edgeTarget = []
+        self.edgeStrength = []
         for edge in self.graph.edges:
-            self.layoutAttractive(edge)
-               
-        # Move by the given force
-        for node in self.graph.nodes:
-            xmove = self.c * node.layoutForceX
-            ymove = self.c * node.layoutForceY
-
-            max = self.maxVertexMovement
-            if(xmove > max): xmove = max
-            if(xmove < -max): xmove = -max
-            if(ymove > max): ymove = max
-            if(ymove < -max): ymove = -max
-           
-            node.layoutPosX += xmove
-            node.layoutPosY += ymove
-            node.layoutForceX = 0
-            node.layoutForceY = 0
+            nodeweight = edge.get('weight', None)   # ANDY
+            if ((not nodeweight) or (edge['weight'] < 1)):
+                edge['weight'] = 1
+            self.edgeSource.append(nodeIndex[edge['source']])
+            self.edgeTarget.append(nodeIndex[edge['target']])
+            self.edgeStrength.append(math.log(edge['weight']) * 0.5 + 1)
+
+    def layoutSyncFromArrays(self):
+        posX, posY, forceX, forceY = self.posX, self.posY, self.forceX, self.forceY
+        for i, node in enumerate(self.graph.nodes):
+            node.layoutPosX = posX[i]
+            node.layoutPosY = posY[i]
+            node.layoutForceX = forceX[i]
+            node.layoutForceY = forceY[i]
 
-    def layoutRepulsive(self, node1, node2):
-        dx = node2.layoutPosX - node1.layoutPosX
-        dy = node2.layoutPosY - node1.layoutPosY
-        d2 = dx * dx + dy * dy
-        if(d2 < 0.01):
-            dx = 0.1 * random.randint(0,1000)/1000.0 + 0.1
-            dy = 0.1 * random.randint(0,1000)/1000.0 + 0.1
-            d2 = dx * dx + dy * dy
-        d = math.sqrt(d2);
-        if(d < self.maxRepulsiveForceDistance):
-            repulsiveForce = self.k * self.k / d
-            node2.layoutForceX += repulsiveForce * dx / d
-            node2.layoutForceY += repulsiveForce * dy / d
-            node1.layoutForceX -= repulsiveForce * dx / d
-            node1.layoutForceY -= repulsiveForce * dy / d
-
-    def layoutAttractive(self, edge):
-        node1 = edge['source']
-        node2 = edge['target']
-       
-        dx = node2.layoutPosX - node1.layoutPosX
-        dy = node2.layoutPosY - node1.layoutPosY
-        d2 = dx * dx + dy * dy
-        if(d2 < 0.01):
-            dx = 0.1 * random.randint(0,1000)/1000.0 + 0.1
-            dy = 0.1 * random.randint(0,1000)/1000.0 + 0.1
+    def layoutIteration(self):
+        # A single iteration working on the nodes themselves, for callers
+        # outside of layout()
+        self.layoutSyncToArrays()
+        self.layoutIterations(1)
+        self.layoutSyncFromArrays()
+
+    def layoutIterations(self, iterations):
+        spring_iterate(self.posX, self.posY, self.forceX, self.forceY,
+                       self.edgeSource, self.edgeTarget, self.edgeStrength, iterations,
+                       self.k, self.c, self.maxRepulsiveForceDistance, self.maxVertexMovement)
+
+
+def spring_iterate(posX, posY, forceX, forceY, edgeSource, edgeTarget, edgeStrength, iterations, k, c, maxdistance, maxmove):
+    """
+    The spring layout kernel.  Runs 'iterations' iterations of node-node
+    repulsion, edge attraction and movement over the parallel position and
+    force lists built by GraphLayoutSpring.layoutSyncToArrays(), likewise
+    the edge lists.
+
+    Deliberately a plain function working only on its arguments and locals,
+    since local variable access is the fastest thing CPython does and this
+    loop is where all the layout time goes.  For the same reason anything
+    derived purely from the constants is worked out once up here.
+    """
+    numnodes = len(posX)
+    kk = k * k
+    maxdistance2 = maxdistance * maxdistance
+    sqrt = math.sqrt
+    randint = random.randint
+    springs = zip(edgeSource, edgeTarget, edgeStrength)
+
+    for iteration in range(0, iterations):
+
+        # Forces on nodes due to node-node repulsions
+        for i in range(0, numnodes):
+            x1 = posX[i]
+            y1 = posY[i]
+            for j in range(i + 1, numnodes):
+                dx = posX[j] - x1
+                dy = posY[j] - y1
+                d2 = dx * dx + dy * dy
+                if(d2 < 0.01):
+                    dx = 0.1 * randint(0,1000)/1000.0 + 0.1
+                    dy = 0.1 * randint(0,1000)/1000.0 + 0.1
+                    d2 = dx * dx + dy * dy
+                if(d2 < maxdistance2):     # i.e. d < maxdistance, most pairs aren't so skip their sqrt
+                    d = sqrt(d2)
+                    repulsiveForce = kk / d
+                    fx = repulsiveForce * dx / d
+                    fy = repulsiveForce * dy / d
+                    forceX[j] += fx
+                    forceY[j] += fy
+                    forceX[i] -= fx
+                    forceY[i] -= fy
+
+        # Forces on nodes due to edge attractions.  Edges are deliberately
+        # visited in graph.edges order rather than grouped per node (CSR
+        # style) - regrouping changes the order the forces accumulate in and
+        # thus the layout, and this pass is O(edges) next to the O(nodes^2)
+        # repulsion above, so there is little for it to win.
+        for i, j, strength in springs:
+            dx = posX[j] - posX[i]
+            dy = posY[j] - posY[i]
             d2 = dx * dx + dy * dy
-        d = math.sqrt(d2);
-        if(d > self.maxRepulsiveForceDistance):
-            d = self.maxRepulsiveForceDistance
-            d2 = d * d
-        attractiveForce = (d2 - self.k * self.k) / self.k
-        nodeweight = edge.get('weight', None)   # ANDY      
-        if ((not nodeweight) or (edge['weight'] < 1)):
-            edge['weight'] = 1
-        attractiveForce *= math.log(edge['weight']) * 0.5 + 1
-       
-        node2.layoutForceX -= attractiveForce * dx / d
-        node2.layoutForceY -= attractiveForce * dy / d
-        node1.layoutForceX += attractiveForce * dx / d
-        node1.layoutForceY += attractiveForce * dy / d
+            if(d2 < 0.01):
+                dx = 0.1 * randint(0,1000)/1000.0 + 0.1
+                dy = 0.1 * randint(0,1000)/1000.0 + 0.1
+                d2 = dx * dx + dy * dy
+            d = sqrt(d2)
+            if(d > maxdistance):
+                d = maxdistance
+                d2 = maxdistance2
+            attractiveForce = (d2 - kk) / k
+            attractiveForce *= strength
+
+            fx = attractiveForce * dx / d
+            fy = attractiveForce * dy / d
+            forceX[j] -= fx
+            forceY[j] -= fy
+            forceX[i] += fx
+            forceY[i] += fy
+
+        # Move by the given force
+        for i in range(0, numnodes):
+            xmove = c * forceX[i]
+            ymove = c * forceY[i]
+
+            if(xmove > maxmove): xmove = maxmove
+            if(xmove < -maxmove): xmove = -maxmove
+            if(ymove > maxmove): ymove = maxmove
+            if(ymove < -maxmove): ymove = -maxmove
+
+            posX[i] += xmove
+            posY[i] += ymove
+            forceX[i] = 0
+            forceY[i] = 0
 
 
 if __name__ == '__main__':
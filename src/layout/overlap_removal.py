@@ -8,10 +8,15 @@
 # should slightly move the vertices around to remove overlap.
 
 from model.graph import GraphNode
+from quadtree import Quadtree
+from spatial_grid import SpatialGrid
 import math
 
 MARGIN = 5
 MAX_CYCLES = 20
+INDEX_MIN_NODES = 32  # below this many nodes just compare every pair, an index isn't worth building
+GRID_MAX_NODES = 100  # below this many nodes index with a SpatialGrid rather than a Quadtree
+GRID_MIN_CELL = 32
 LINE_NODE_OVERLAP_REMOVAL_ENABLED = False  # keep this as False, LN overlap too hard to implement.
 
 class OverlapRemoval:
@@ -21,23 +26,94 @@ class OverlapRemoval:
         self.gui = gui
         self.margin = margin
         self.stats = {}
+        self.spatial_index = None
+        self.spatial_grid = None    # kept between uses, see BuildSpatialIndex()
+        self.node_positions = None  # see BuildSpatialIndex()
+        self.clean_positions = None # see RunRemovalCycle()
         
-    def GetPermutations(self, lzt):
+    def SweepPairs(self):
+        """
+        Returns (i, j) pairs, i < j, of positions in graph.nodes whose nodes
+        overlap horizontally - a superset of the pairs that Hit().  Nodes are
+        sorted by left edge so each node is only compared with the nodes that
+        start before it ends, rather than with every other node.
+        """
+        nodes = self.graph.nodes
+        xs = sorted((node.left, node.left + node.width, i) for i, node in enumerate(nodes))
         result = []
-        for i in range(0, len(lzt)):
-            for j in range(i+1, len(lzt)):
-                result.append((lzt[i], lzt[j]))
+        for k, (l1, r1, i) in enumerate(xs):
+            for l2, r2, j in xs[k+1:]:
+                if l2 >= r1:
+                    break
+                result.append((i, j) if i < j else (j, i))
         return result
 
     def Hit(self, node1, node2):
-        l = max(node1.left,   node2.left)
-        r = min(node1.right,  node2.right)
-        t = max(node1.top,    node2.top)
-        b = min(node1.bottom, node2.bottom)
-        return (r>l) and (b>t)            
+        # The innermost test of the whole algorithm, so spelt out in plain
+        # arithmetic - no right/bottom property calls, no max()/min() calls
+        l1, t1 = node1.left, node1.top
+        l2, t2 = node2.left, node2.top
+        r1, b1 = l1 + node1.width, t1 + node1.height
+        r2, b2 = l2 + node2.width, t2 + node2.height
+        l = l1 if l1 > l2 else l2
+        r = r1 if r1 < r2 else r2
+        t = t1 if t1 > t2 else t2
+        b = b1 if b1 < b2 else b2
+        return (r>l) and (b>t)
+
+    def BuildSpatialIndex(self):
+        """
+        Index the node rectangles so that the hit tests only look at nearby
+        nodes.  Index items are positions in graph.nodes, so that candidates
+        can be put back into graph.nodes order - the removal algorithm relies
+        on visiting nodes in that order.  Only valid whilst nothing but this
+        class moves the nodes, see ApplyProposal().
+
+        Small graphs get no index at all (spatial_index stays None and every
+        node is a candidate), medium ones a uniform grid with cells about the
+        size of the average node, big ones a quadtree, which copes better
+        with very uneven node sizes.  The grid is reused from call to call.
+        """
+        nodes = self.graph.nodes
+        self.node_positions = dict((node, i) for i, node in enumerate(nodes))
+        if len(nodes) < INDEX_MIN_NODES:
+            self.spatial_index = None
+            return
+
+        # Gather every node's rectangle just the once, then work by column
+        bounds = [node.GetBounds() for node in nodes]
+        lefts, tops, rights, bottoms = zip(*bounds)
+        if len(nodes) < GRID_MAX_NODES:
+            cell = max(GRID_MIN_CELL, (sum(rights) - sum(lefts) + sum(bottoms) - sum(tops)) / float(len(nodes)))
+            if self.spatial_grid is None:
+                self.spatial_grid = SpatialGrid(cell)
+            else:
+                self.spatial_grid.Clear(cell)
+            self.spatial_index = self.spatial_grid
+        else:
+            self.spatial_index = Quadtree((min(lefts), min(tops), max(rights), max(bottoms)))
+        for i, rect in enumerate(bounds):
+            self.spatial_index.Insert(i, rect)
+
+    def DiscardSpatialIndex(self):
+        self.spatial_index = None
+        self.node_positions = None
+
+    def CandidatePositions(self, currnode):
+        # Positions in graph.nodes of the nodes which might hit currnode, in order
+        if self.spatial_index is None:
+            return range(len(self.graph.nodes))
+        return sorted(self.spatial_index.Retrieve(currnode.GetBounds()))
+
+    def NodesNear(self, currnode):
+        # Candidate nodes for hitting currnode, in graph.nodes order
+        if self.spatial_index is None:
+            return self.graph.nodes
+        nodes = self.graph.nodes
+        return [nodes[i] for i in self.CandidatePositions(currnode)]
 
     def IsHitting(self, currnode, ignorenode=None, ignorenodes=[]):
-        for node in self.graph.nodes:
+        for node in self.NodesNear(currnode):
             if node == currnode or node == ignorenode or node in ignorenodes:
                 continue
             if self.Hit(currnode, node):
@@ -46,13 +122,24 @@ class OverlapRemoval:
 
     def GetAllHits(self, currnode, ignorenodes=[]):
         result = []
-        for node in self.graph.nodes:
+        for node in self.NodesNear(currnode):
             if node == currnode or node in ignorenodes:
                 continue
             if self.Hit(currnode, node):
                 result.append(node)
         return result
 
+    def FindNextHit(self, node1, after):
+        """
+        Returns (position, node) of the first node after position 'after' in
+        graph.nodes which currently hits node1, or (None, None).
+        """
+        nodes = self.graph.nodes
+        for j in self.CandidatePositions(node1):
+            if j > after and self.Hit(node1, nodes[j]):
+                return j, nodes[j]
+        return None, None
+
     def MoveWouldHitSomething(self, movingnode, deltaX=0, deltaY=0, ignorenode=None, ignorenodes=[]):   # TODO make this take into account the margin?  Sometimes get very close nodes.
         # delta values can be positive or negative
         proposednode = self.BuildProposedNode(self.BuildProposalXY(movingnode, deltaX, deltaY))
@@ -84,8 +171,8 @@ class OverlapRemoval:
 
     def CalcOverlapAmounts(self, node1, node2):
         leftnode, rightnode, topnode, bottomnode = self.SortNodesLrtb(node1, node2)
-        xoverlap_amount = abs(leftnode.right + self.margin - rightnode.left)
-        yoverlap_amount = abs(topnode.bottom + self.margin - bottomnode.top)
+        xoverlap_amount = abs(leftnode.left + leftnode.width + self.margin - rightnode.left)
+        yoverlap_amount = abs(topnode.top + topnode.height + self.margin - bottomnode.top)
         # Overlap amounts returned are always positive values
         return leftnode, rightnode, topnode, bottomnode, xoverlap_amount, yoverlap_amount
 
@@ -180,6 +267,12 @@ class OverlapRemoval:
         node.left += x
         node.top += y
         self.BanNode(node)
+        if self.node_positions is not None:
+            i = self.node_positions[node]
+            if self.spatial_index is not None:
+                self.spatial_index.Update(i, node.GetBounds())
+            if self.clean_positions is not None:
+                self.clean_positions[:i+1] = [False] * (i+1)
         
         # Update Stats
         if proposal['amount'] < 0:
@@ -512,18 +605,37 @@ class OverlapRemoval:
         numfixed_thiscycle = 0
         found_an_overlap_thiscycle = False
     
-        for node1, node2 in self.GetPermutations(self.graph.nodes):  # a 'cycle'
-            if self.Hit(node1, node2):
+        # A 'cycle' visits every permutation of nodes (node1, node2) in order,
+        # but only the permutations that are hitting need any work.  Since
+        # fixing an overlap moves nodes, always look for the next hit of node1
+        # against the current node positions.
+        #
+        # A node which hit nothing after it last time round, with no node at
+        # or after it moved since, is known not to hit anything now either.
+        clean = self.clean_positions
+        for i, node1 in enumerate(self.graph.nodes):
+            if clean[i]:
+                continue
+            j, node2 = self.FindNextHit(node1, after=i)
+            clean[i] = node2 is None
+            while node2:
                 found_an_overlap_thiscycle = True
                 self.total_overlaps_found += 1
                 
                 numfixed_thiscycle += self.ProposeRemovalsAndApply(node1, node2)
+
+                j, node2 = self.FindNextHit(node1, after=j)
                 
         return found_an_overlap_thiscycle, numfixed_thiscycle
     
     def RemoveOverlaps(self, watch_removals=True):           # Main method to call
         self.InitStats()
         self.ResetBans()
+        if len(self.graph.nodes) < 2:
+            self.SetStats(1, True)  # nothing to overlap, not worth any setting up
+            return True
+        self.BuildSpatialIndex()
+        self.clean_positions = [False] * len(self.graph.nodes)
         for total_cycles in range(1, MAX_CYCLES):
             
             found_overlaps, num_overlaps_fixed = self.RunRemovalCycle()
@@ -540,13 +652,39 @@ class OverlapRemoval:
                     
         all_overlaps_were_removed = not found_overlaps
         
+        self.DiscardSpatialIndex()  # the gui is free to move nodes from now on
+        self.clean_positions = None
         self.SetStats(total_cycles, all_overlaps_were_removed)
         return all_overlaps_were_removed
 
+    def AnyOverlap(self):
+        # Cheap check for whether RemoveOverlaps() would have anything to do,
+        # stops at the first overlap rather than counting them all
+        nodes = self.graph.nodes
+        self.BuildSpatialIndex()
+        if self.spatial_index is None:
+            pairs = self.SweepPairs()   # small graph, no index was built
+        else:
+            pairs = ((i, j) for i, node1 in enumerate(nodes) for j in self.CandidatePositions(node1) if j > i)
+        found = False
+        for i, j in pairs:
+            if self.Hit(nodes[i], nodes[j]):
+                found = True
+                break
+        self.DiscardSpatialIndex()
+        return found
+
     def CountOverlaps(self):           # Main method to call
+        self.BuildSpatialIndex()
+        nodes = self.graph.nodes
+        if self.spatial_index is None:
+            pairs = self.SweepPairs()
+        else:
+            pairs = self.spatial_index.Pairs()
         count = 0
-        for node1, node2 in self.GetPermutations(self.graph.nodes):
-            if self.Hit(node1, node2):
+        for i, j in pairs:
+            if self.Hit(nodes[i], nodes[j]):
                 count += 1
+        self.DiscardSpatialIndex()
         return count
         
\ No newline at end of file
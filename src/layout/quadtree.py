@@ -0,0 +1,136 @@
+# quadtree
+#
+# Spatial index of axis aligned rectangles, used by overlap removal so that
+# finding the nodes which hit a node doesn't mean scanning every node.
+#
+# Rectangles are (left, top, right, bottom) tuples.  Items live in the deepest
+# quad that fully contains them.  Quads are 'loose' - the bounds used to decide
+# containment are grown by an overlap fraction of the quad size - so that small
+# items sitting on a quad border don't all pile up in the parent quad.  Items
+# outside the root bounds simply live in the root.
+
+CAPACITY = 8
+MAX_DEPTH = 6
+OVERLAP = 0.25
+
+def rects_touch(r1, r2):
+    # Inclusive test, deliberately looser than OverlapRemoval.Hit() so that
+    # callers get a superset of candidates and do the precise test themselves.
+    return r1[0] <= r2[2] and r2[0] <= r1[2] and r1[1] <= r2[3] and r2[1] <= r1[3]
+
+def rect_contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+class Quadtree:
+    def __init__(self, bounds, capacity=CAPACITY, max_depth=MAX_DEPTH, overlap=OVERLAP, depth=0, where=None):
+        self.bounds = bounds
+        self.capacity = capacity
+        self.max_depth = max_depth
+        self.overlap = overlap
+        self.depth = depth
+
+        l, t, r, b = bounds
+        growx, growy = (r - l) * overlap, (b - t) * overlap
+        self.loose_bounds = (l - growx, t - growy, r + growx, b + growy)
+
+        self.items = {}     # item -> rect, for the items stored in this quad
+        self.children = None
+
+        # item -> quad it lives in, shared by the whole tree so that Remove()
+        # doesn't need to search for the item.
+        if where is None:
+            where = {}
+        self.where = where
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, item):
+        return item in self.where
+
+    def Insert(self, item, rect):
+        if item in self.where:
+            self.Remove(item)
+        quad = self
+        while quad.children is not None:
+            child = quad._ChildFor(rect)
+            if child is None:
+                break
+            quad = child
+        quad._Store(item, rect)
+
+    def Remove(self, item):
+        quad = self.where.pop(item, None)
+        if quad is not None:
+            del quad.items[item]
+
+    def Update(self, item, rect):
+        quad = self.where.get(item)
+        if quad is not None and rect_contains(quad.loose_bounds, rect) and \
+           (quad.children is None or quad._ChildFor(rect) is None):
+            quad.items[item] = rect     # still belongs in the same quad
+        else:
+            self.Insert(item, rect)
+
+    def Retrieve(self, rect):
+        """
+        Returns the items whose rectangles touch or intersect rect, in no
+        particular order.
+        """
+        result = []
+        pending = [self]
+        while pending:
+            quad = pending.pop()
+            for item, itemrect in quad.items.iteritems():
+                if rects_touch(rect, itemrect):
+                    result.append(item)
+            if quad.children is not None:
+                for child in quad.children:
+                    if rects_touch(rect, child.loose_bounds):
+                        pending.append(child)
+        return result
+
+    def Pairs(self):
+        """
+        Returns (item1, item2) pairs, item1 < item2, of every two items whose
+        rectangles touch or intersect.
+        """
+        result = []
+        for item1, quad in self.where.iteritems():
+            for item2 in self.Retrieve(quad.items[item1]):
+                if item1 < item2:
+                    result.append((item1, item2))
+        return result
+
+    def Clear(self):
+        self.items = {}
+        self.children = None
+        self.where.clear()
+
+    def _ChildFor(self, rect):
+        for child in self.children:
+            if rect_contains(child.loose_bounds, rect):
+                return child
+        return None
+
+    def _Store(self, item, rect):
+        self.items[item] = rect
+        self.where[item] = self
+        if self.children is None and len(self.items) > self.capacity and self.depth < self.max_depth:
+            self._Split()
+
+    def _Split(self):
+        l, t, r, b = self.bounds
+        midx, midy = (l + r) / 2.0, (t + b) / 2.0
+        self.children = [Quadtree(quadbounds, self.capacity, self.max_depth, self.overlap, self.depth + 1, self.where)
+                         for quadbounds in ((l, t, midx, midy), (midx, t, r, midy),
+                                            (l, midy, midx, b), (midx, midy, r, b))]
+        items = self.items
+        self.items = {}
+        for item, rect in items.iteritems():
+            child = self._ChildFor(rect)
+            if child is None:
+                self.items[item] = rect
+                self.where[item] = self
+            else:
+                child._Store(item, rect)
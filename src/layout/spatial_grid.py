@@ -0,0 +1,101 @@
+# spatial grid
+#
+# Uniform grid (spatial hash) of axis aligned rectangles, same interface as
+# Quadtree.  With a cell size around the size of the largest rectangle each
+# rectangle only lands in a handful of cells, which for smallish diagrams of
+# similar sized nodes is cheaper to maintain and query than a quadtree.
+#
+# Rectangles are (left, top, right, bottom) tuples.
+
+import math
+from quadtree import rects_touch
+
+class SpatialGrid:
+    def __init__(self, cell):
+        self.cell = float(max(cell, 1))
+        self.cells = {}     # (col, row) -> set of items
+        self.items = {}     # item -> rect
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def _CellRange(self, rect):
+        cell = self.cell
+        l, t, r, b = rect
+        return (int(math.floor(l / cell)), int(math.floor(t / cell)),
+                int(math.floor(r / cell)), int(math.floor(b / cell)))
+
+    def _Keys(self, cellrange):
+        col1, row1, col2, row2 = cellrange
+        return [(col, row) for col in range(col1, col2 + 1) for row in range(row1, row2 + 1)]
+
+    def Insert(self, item, rect):
+        if item in self.items:
+            self.Remove(item)
+        self.items[item] = rect
+        cells = self.cells
+        for key in self._Keys(self._CellRange(rect)):
+            bucket = cells.get(key)
+            if bucket is None:
+                bucket = cells[key] = set()
+            bucket.add(item)
+
+    def Remove(self, item):
+        rect = self.items.pop(item, None)
+        if rect is None:
+            return
+        cells = self.cells
+        for key in self._Keys(self._CellRange(rect)):
+            bucket = cells[key]
+            bucket.discard(item)
+            if not bucket:
+                del cells[key]
+
+    def Update(self, item, rect):
+        oldrect = self.items.get(item)
+        if oldrect is not None and self._CellRange(oldrect) == self._CellRange(rect):
+            self.items[item] = rect     # still covers the same cells
+        else:
+            self.Insert(item, rect)
+
+    def Retrieve(self, rect):
+        """
+        Returns the items whose rectangles touch or intersect rect, in no
+        particular order.
+        """
+        found = set()
+        cells = self.cells
+        for key in self._Keys(self._CellRange(rect)):
+            bucket = cells.get(key)
+            if bucket:
+                found.update(bucket)
+        items = self.items
+        return [item for item in found if rects_touch(rect, items[item])]
+
+    def Pairs(self):
+        """
+        Returns (item1, item2) pairs, item1 < item2, of every two items whose
+        rectangles touch or intersect.  Only items sharing a cell are compared.
+        """
+        result = set()
+        items = self.items
+        for bucket in self.cells.itervalues():
+            if len(bucket) < 2:
+                continue
+            bucket = sorted(bucket)
+            for i, item1 in enumerate(bucket):
+                rect1 = items[item1]
+                for item2 in bucket[i + 1:]:
+                    if rects_touch(rect1, items[item2]):
+                        result.add((item1, item2))
+        return list(result)
+
+    def Clear(self, cell=None):
+        # Empties the grid keeping its dicts, optionally changing the cell size
+        self.cells.clear()
+        self.items.clear()
+        if cell is not None:
+            self.cell = float(max(cell, 1))
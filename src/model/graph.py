@@ -36,8 +36,12 @@ class Graph:
         node.id = new_id
         self.nodeSet[node.id] = node
 
+    def __contains__(self, id):
+        # e.g. "if 'A' in graph:" - cheaper than FindNodeById() when you don't need the node
+        return id in self.nodeSet
+
     def AddNode(self, node):
-        if not self.FindNodeById(node.id):
+        if node.id not in self.nodeSet:
             self.nodeSet[node.id] = node
             self.nodes.append(node)
         return node
@@ -53,8 +57,8 @@ class Graph:
         #        tell at this point.
         
         # If node hasn't been added, then add it now
-        if not self.FindNodeById(source_node.id): self.AddNode(source_node)
-        if not self.FindNodeById(target_node.id): self.AddNode(target_node)
+        if source_node.id not in self.nodeSet: self.AddNode(source_node)
+        if target_node.id not in self.nodeSet: self.AddNode(target_node)
             
         edge = {'source': source_node, 'target': target_node}
         if weight:
@@ -65,7 +69,7 @@ class Graph:
     def DeleteNode(self, node):
         if node:
             self.nodes.remove(node)
-            if node.id in self.nodeSet.keys():
+            if node.id in self.nodeSet:
                 del self.nodeSet[node.id]
         for edge in self.edges[:]:
             if edge['source'].id == node.id or edge['target'].id == node.id:
@@ -243,6 +247,9 @@ class Graph:
     def LoadGraphFromStrings(self, filedata_str, force=False):
         return self.persistence.Load(filedata_str, force)
 
+    def LoadGraphFromRecords(self, records):
+        self.persistence.LoadRecords(records)
+
     def GraphToString(self):
         return self.persistence.Save()
  
@@ -407,17 +414,22 @@ class GraphNode:
     def get_right(self):
         return self.left + self.width
 
+    # Computed rather than stored, so that everything is free to just assign
+    # left/top/width/height.  Code that wants all four sides works them out
+    # from left/top/width/height itself rather than calling these repeatedly.
     bottom = property(get_bottom)
     right = property(get_right)
 
     def GetBounds(self):
-        return self.left, self.top, self.right, self.bottom
+        left, top = self.left, self.top
+        return left, top, left + self.width, top + self.height
 
     def get_lines(self):
-        return [((self.left, self.top), (self.right, self.top)),
-                ((self.right, self.top), (self.right, self.bottom)),
-                ((self.right, self.bottom), (self.left, self.bottom)),
-                ((self.left, self.bottom), (self.left, self.top))]
+        l, t, r, b = self.GetBounds()
+        return [((l, t), (r, t)),
+                ((r, t), (r, b)),
+                ((r, b), (l, b)),
+                ((l, b), (l, t))]
 
     lines = property(get_lines)
         
@@ -443,7 +455,8 @@ class GraphNode:
     centre_point = property(get_centre_point)
     
     def ContainsPoint(self, point):
-        return point[0] >= self.left and point[0] <= self.right and point[1] >= self.top and point[1] <= self.bottom
+        l, t, r, b = self.GetBounds()
+        return point[0] >= l and point[0] <= r and point[1] >= t and point[1] <= b
         
     def __str__(self):
         return "Node %15s: x/left,y/top (% 4d, % 4d) w,h (% 4d, % 4d) layoutPosX,layoutPosY (% 2.2f, % 2.2f)" % (self.id, self.left, self.top, self.width, self.height, self.layoutPosX, self.layoutPosY)
@@ -8,9 +8,19 @@ handle the n-1 to n conversion (just the one step from the previous version to
 this new version n)
 """
 
+import json
+import ast
+import re
+
 PERSISTENCE_UPGRADE_SEQUENCE = [0.9, 1.0, 1.1]
 PERSISTENCE_CURRENT_VERSION = PERSISTENCE_UPGRADE_SEQUENCE[-1]
 
+NODE_TYPE_PATTERN = re.compile("'node'")  # 1.0 type name, upgraded to 'umlshape' in 1.1
+
+def _utf8_record(obj):
+    # json gives back unicode, eval gave plain strings - keep it that way
+    return dict((key.encode('utf-8'), val.encode('utf-8') if isinstance(val, unicode) else val) for key, val in obj.iteritems())
+
 class GraphPersistence:
 
     def __init__(self, graph):
@@ -107,9 +117,8 @@ class GraphPersistence:
             """
             self.filedata_list[0] = "# PynSource Version 1.1"
             self.filedata_list.insert(1, "{'type':'meta', 'info1':'Lorem ipsum dolor sit amet, consectetur adipiscing elit.'}")
-            import re
             for i in range(2, len(self.filedata_list)):
-                self.filedata_list[i] = re.sub("'node'", "'umlshape'", self.filedata_list[i])
+                self.filedata_list[i] = NODE_TYPE_PATTERN.sub("'umlshape'", self.filedata_list[i])
         else:
             print "Don't know how to upgrade persistence format to %f" % to_vers
 
@@ -126,14 +135,15 @@ class GraphPersistence:
         if not self.UpgradeToLatestFileFormatVersion(filedata_str) and force == False:
             return False
 
-        for data in self.filedata_list:
-            data = data.strip()
-            if not data:
-                continue
-            if data[0] == '#':
-                continue
-            #print data
-            data = eval(data)
+        self.LoadRecords(self.ParseRecords(self.filedata_list))
+        return True
+
+    def LoadRecords(self, records):
+        """
+        Creates the nodes and edges described by already parsed records, see
+        ParseRecords().  The records are not modified so can be loaded again.
+        """
+        for data in records:
             if data['type'] == 'meta':
                 pass
             if data['type'] == 'umlshape':
@@ -161,7 +171,29 @@ class GraphPersistence:
                 #assert len(set(self.nodes)) == len(self.nodes), [node.id for node in self.nodes] # ensure no duplicates nodes have been created
                 #assert len(set([str(e) for e in self.edges])) == len(self.edges), data # ensure no duplicates edges have been created
 
-        return True
+    def ParseRecords(self, filedata_list):
+        """
+        Returns the list of dicts described by the non comment lines.
+
+        Records are python dict literals, but when no string in them can be
+        holding a quote or an escape every single quote is a string delimiter,
+        so the whole lot can be parsed as one json array - much quicker than
+        eval'ing each line.  Anything else (or anything json won't take) goes
+        the slower literal_eval route, a line at a time.
+        """
+        lines = []
+        for data in filedata_list:
+            data = data.strip()
+            if data and data[0] != '#':
+                lines.append(data)
+
+        text = '[' + ','.join(lines) + ']'
+        if '"' not in text and '\\' not in text:
+            try:
+                return json.loads(text.replace("'", '"'), object_hook=_utf8_record)
+            except ValueError:
+                pass
+        return [ast.literal_eval(data) for data in lines]
 
     def Save(self):
         """
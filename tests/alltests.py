@@ -49,6 +49,8 @@ def suite():
             'test_parse_08',
             'test_overlaps1',
             'test_overlaps2stress',
+            'test_quadtree',
+            'test_spatial_grid',
             'test_asciiworkspace_01',
             'test_asciiworkspace_02',
             'test_parse_yuml_01',
@@ -23,10 +23,13 @@ class TestCase_A(unittest.TestCase):
         assert len(g.nodes) == 2
         assert len(g.nodeSet.keys()) == 2
         assert len(g.edges) == 1
+        assert 'B' in g
         g.DeleteNodeById('B')
         assert len(g.nodes) == 1
         assert len(g.nodeSet.keys()) == 1
         assert len(g.edges) == 0
+        assert 'A' in g
+        assert 'B' not in g
 
         # Old persistence format - very simple, I call this 0.9 format.    
         filedata = """
@@ -10,16 +10,27 @@ import pprint
 sys.path.append("../Research/layout force spring")
 from data_testgraphs import *
 
-class OverlapTests(unittest.TestCase):
+def _ParseScenario(filedata_str):
+    persistence = Graph().persistence
+    assert persistence.UpgradeToLatestFileFormatVersion(filedata_str)
+    return persistence.ParseRecords(persistence.filedata_list)
+
+# Parsed once here rather than every time a test loads a scenario
+SCENARIOS = dict((name, _ParseScenario(filedata_str)) for name, filedata_str in
+                 [('1', TEST_GRAPH1), ('2', TEST_GRAPH2), ('3', TEST_GRAPH3), ('3A', TEST_GRAPH3A),
+                  ('4', TEST_GRAPH4), ('6', TEST_GRAPH6), ('7', TEST_GRAPH7), ('8', TEST_GRAPH8)])
+
+class FakeGui:
+    def stateofthenation(self, recalibrate=False, auto_resize_canvas=True):
+        pass
 
-    def setUp(self):
+FAKE_GUI = FakeGui()
 
-        class FakeGui:
-            def stateofthenation(self, recalibrate=False, auto_resize_canvas=True):
-                pass
+class OverlapTests(unittest.TestCase):
 
+    def setUp(self):
         self.g = Graph()
-        self.overlap_remover = OverlapRemoval(self.g, margin=5, gui=FakeGui())
+        self.overlap_remover = OverlapRemoval(self.g, margin=5, gui=FAKE_GUI)
 
     def tearDown(self):
         #pprint.pprint(self.overlap_remover.GetStats())
@@ -30,7 +41,9 @@ class OverlapTests(unittest.TestCase):
         g.AddNode(GraphNode('A', 0, 0, 250, 250))
 
         were_all_overlaps_removed = self.overlap_remover.RemoveOverlaps()
+        self.assertTrue(were_all_overlaps_removed)
         self.assertEqual(0, self.overlap_remover.GetStats()['total_overlaps_found'])
+        self.assertEqual(1, self.overlap_remover.GetStats()['total_cycles'])
 
     def test0_2TwoNode_notoverlapping(self):
         g = self.g
@@ -59,47 +72,74 @@ class OverlapTests(unittest.TestCase):
         were_all_overlaps_removed = self.overlap_remover.RemoveOverlaps()
         self.assertTrue(were_all_overlaps_removed)
 
+    def test0_5AnyOverlap(self):
+        g = self.g
+        self.assertFalse(self.overlap_remover.AnyOverlap())
+        g.AddNode(GraphNode('A', 0, 0, 250, 250))
+        g.AddNode(GraphNode('B', 260, 0, 250, 250))
+        self.assertFalse(self.overlap_remover.AnyOverlap())
+        g.AddNode(GraphNode('C', 200, 200, 250, 250))
+        self.assertTrue(self.overlap_remover.AnyOverlap())
+        self.assertTrue(self.overlap_remover.RemoveOverlaps())
+        self.assertFalse(self.overlap_remover.AnyOverlap())
+
+    def test0_6CountOverlaps(self):
+        g = self.g
+        g.AddNode(GraphNode('A', 0, 0, 250, 250))
+        g.AddNode(GraphNode('B', 250, 0, 250, 250))     # just touching A
+        g.AddNode(GraphNode('C', 200, 200, 100, 100))   # hits A and B
+        g.AddNode(GraphNode('D', 210, 600, 20, 20))     # lines up with C but well below
+        self.assertEqual(2, self.overlap_remover.CountOverlaps())
+        self.assertEqual([(0, 2), (0, 3), (1, 2), (2, 3)], sorted(self.overlap_remover.SweepPairs()))
+
+    def test0_7AnyOverlapSmallGraph(self):
+        # Below the size that gets a spatial index AnyOverlap() should only
+        # test pairs that SweepPairs() can't rule out, never every ordered pair
+        g = self.g
+        for i in range(20):
+            g.AddNode(GraphNode('n%d' % i, (i % 5) * 100, (i / 5) * 100, 80, 80))
+        hits = []
+        def Hit(node1, node2):
+            hits.append((node1, node2))
+            return OverlapRemoval.Hit(self.overlap_remover, node1, node2)
+        self.overlap_remover.Hit = Hit
+
+        self.assertFalse(self.overlap_remover.AnyOverlap())
+        self.assertEqual(len(self.overlap_remover.SweepPairs()), len(hits))
+        self.assertTrue(len(hits) < 20 * 19 / 2)
+
+        g.nodes[-1].left, g.nodes[-1].top = 350, 350   # onto its neighbour n18
+        self.assertTrue(self.overlap_remover.AnyOverlap())
+
     """
     Smarter tests.
     Load scenarios from persistence and use special box comparison utility methods
     """
 
+    def _ensureOrder(self, ids, before_attr, after_attr):
+        # Each node's before_attr must be less than the next node's after_attr
+        assert len(ids) >= 2
+        nodes = [self.g.FindNodeById(id) for id in ids]
+        befores = [getattr(node, before_attr) for node in nodes[:-1]]
+        afters = [getattr(node, after_attr) for node in nodes[1:]]
+        return all(before < after for before, after in zip(befores, afters))
+
     def _ensureXorder(self, *args):
-        nodes = [self.g.FindNodeById(id) for id in args]
-        assert len(nodes) >= 2
-        for i in range(0,len(nodes)-1):
-            if not nodes[i].right < nodes[i+1].left:
-                return False
-        return True
+        return self._ensureOrder(args, 'right', 'left')
 
     def _ensureXorderLefts(self, *args):
-        nodes = [self.g.FindNodeById(id) for id in args]
-        assert len(nodes) >= 2
-        for i in range(0,len(nodes)-1):
-            if not nodes[i].left < nodes[i+1].left:
-                return False
-        return True
+        return self._ensureOrder(args, 'left', 'left')
 
     def _ensureYorder(self, *args):
-        nodes = [self.g.FindNodeById(id) for id in args]
-        assert len(nodes) >= 2
-        for i in range(0,len(nodes)-1):
-            if not nodes[i].bottom < nodes[i+1].top:
-                return False
-        return True
+        return self._ensureOrder(args, 'bottom', 'top')
 
     def _ensureYorderBottoms(self, *args):
-        nodes = [self.g.FindNodeById(id) for id in args]
-        assert len(nodes) >= 2
-        for i in range(0,len(nodes)-1):
-            if not nodes[i].bottom < nodes[i+1].bottom:
-                return False
-        return True
+        return self._ensureOrder(args, 'bottom', 'bottom')
     
 
 
     def _LoadScenario1(self):
-        self.g.LoadGraphFromStrings(TEST_GRAPH1)
+        self.g.LoadGraphFromRecords(SCENARIOS['1'])
 
     def test1_1MoveLeftPushedBackHorizontally01(self):
         self._LoadScenario1()
@@ -168,7 +208,7 @@ class OverlapTests(unittest.TestCase):
         
         
     def _LoadScenario2(self):
-        self.g.LoadGraphFromStrings(TEST_GRAPH2)        
+        self.g.LoadGraphFromRecords(SCENARIOS['2'])        
         
     def test2_1InsertAndPushedRightHorizontally(self):
         self._LoadScenario2()
@@ -207,7 +247,7 @@ class OverlapTests(unittest.TestCase):
 
 
     def _LoadScenario3(self):
-        self.g.LoadGraphFromStrings(TEST_GRAPH3)  
+        self.g.LoadGraphFromRecords(SCENARIOS['3'])  
         
     def test3_1PushedBetweenLeftAndRight(self):
         self._LoadScenario3()
@@ -332,7 +372,7 @@ class OverlapTests(unittest.TestCase):
         self.assertEqual(oldD97pos, (d97.left, d97.top)) # ensure D97 hasn't been pushed
 
     def _LoadScenario3a(self):
-        self.g.LoadGraphFromStrings(TEST_GRAPH3A)
+        self.g.LoadGraphFromRecords(SCENARIOS['3A'])
 
     def test3A_1PushedLeft(self):
         self._LoadScenario3a()
@@ -393,7 +433,7 @@ class OverlapTests(unittest.TestCase):
 
 
     def _LoadScenario4(self):
-        self.g.LoadGraphFromStrings(TEST_GRAPH4)  
+        self.g.LoadGraphFromRecords(SCENARIOS['4'])  
 
     def test4_1InsertedTwoPushedRightTwoPushedDown(self):
         self._LoadScenario4()
@@ -475,7 +515,7 @@ class OverlapTests(unittest.TestCase):
         self.assertNotEqual(oldD13pos, (d13.left, d13.top)) # ensure D13 HAS been pushed
 
     def _LoadScenario6_linecrossing(self):
-        self.g.LoadGraphFromStrings(TEST_GRAPH6)
+        self.g.LoadGraphFromRecords(SCENARIOS['6'])
 
     def test6_1LineCrossingNotNeeded(self):
         
@@ -551,7 +591,7 @@ class OverlapTests(unittest.TestCase):
 
 
     def _LoadScenario7(self):
-        self.g.LoadGraphFromStrings(TEST_GRAPH7)
+        self.g.LoadGraphFromRecords(SCENARIOS['7'])
         
     def test7_1DontJumpTooFarY(self):
         
@@ -596,7 +636,7 @@ class OverlapTests(unittest.TestCase):
         self.assertFalse(self._ensureYorder('A', 'm1')) # don't want this huge Y jump
 
     def _LoadScenario8(self):
-        self.g.LoadGraphFromStrings(TEST_GRAPH8)
+        self.g.LoadGraphFromRecords(SCENARIOS['8'])
 
     def test8_1JumpUpAndSnuggleB1PushedOk(self):
         
@@ -1,8 +1,11 @@
 import unittest
+import random
+import itertools
 
 import sys
 
 sys.path.append("../src")
+from layout import overlap_removal
 from layout.overlap_removal import OverlapRemoval
 from model.graph import Graph, GraphNode
 import pprint
@@ -10,16 +13,17 @@ import pprint
 sys.path.append("../Research/layout force spring")
 from data_testgraphs import *
 
-class OverlapTests(unittest.TestCase):
+class FakeGui:
+    def stateofthenation(self, recalibrate=False, auto_resize_canvas=True):
+        pass
 
-    def setUp(self):
+FAKE_GUI = FakeGui()
 
-        class FakeGui:
-            def stateofthenation(self, recalibrate=False, auto_resize_canvas=True):
-                pass
+class OverlapTests(unittest.TestCase):
 
+    def setUp(self):
         self.g = Graph()
-        self.overlap_remover = OverlapRemoval(self.g, margin=5, gui=FakeGui())
+        self.overlap_remover = OverlapRemoval(self.g, margin=5, gui=FAKE_GUI)
 
     def tearDown(self):
         pass
@@ -63,7 +67,53 @@ class OverlapTests(unittest.TestCase):
             
             were_all_overlaps_removed = self.overlap_remover.RemoveOverlaps()
             self.assertTrue(were_all_overlaps_removed)
-            
+
+    """
+    The spatial index must only make overlap removal quicker, never change
+    what it does.  Random graphs big enough to get indexed are run with and
+    without the index and must end up the same.
+    """
+
+    def _RandomGraph(self, seed, numnodes):
+        rnd = random.Random(seed)
+        size = numnodes * 12    # crowded enough for plenty of overlaps
+        g = Graph()
+        for i in range(numnodes):
+            g.AddNode(GraphNode('n%d' % i, rnd.randint(0, size), rnd.randint(0, size), rnd.randint(20, 120), rnd.randint(20, 80)))
+        return g
+
+    def _RemoveOverlaps(self, seed, numnodes, indexed):
+        g = self._RandomGraph(seed, numnodes)
+        remover = OverlapRemoval(g, margin=5, gui=FAKE_GUI)
+        saved = overlap_removal.INDEX_MIN_NODES
+        if not indexed:
+            overlap_removal.INDEX_MIN_NODES = numnodes + 1
+        try:
+            were_all_overlaps_removed = remover.RemoveOverlaps()
+        finally:
+            overlap_removal.INDEX_MIN_NODES = saved
+        return were_all_overlaps_removed, remover.GetStats(), sorted(g.GetMementoOfPositions().items())
+
+    def _checkIndexedMatchesUnindexed(self, numnodes, index_class):
+        for seed in range(3):
+            g = self._RandomGraph(seed, numnodes)
+            remover = OverlapRemoval(g, margin=5, gui=FAKE_GUI)
+            remover.BuildSpatialIndex()
+            self.assertTrue(isinstance(remover.spatial_index, index_class))
+            remover.DiscardSpatialIndex()
+
+            bruteforce = len([1 for node1, node2 in itertools.combinations(g.nodes, 2) if remover.Hit(node1, node2)])
+            self.assertTrue(bruteforce > 0)
+            self.assertEqual(bruteforce, remover.CountOverlaps())
+
+            self.assertEqual(self._RemoveOverlaps(seed, numnodes, indexed=False),
+                             self._RemoveOverlaps(seed, numnodes, indexed=True))
+
+    def testStress3_GridIndexMatchesNoIndex(self):
+        self._checkIndexedMatchesUnindexed(40, overlap_removal.SpatialGrid)
+
+    def testStress4_QuadtreeIndexMatchesNoIndex(self):
+        self._checkIndexedMatchesUnindexed(120, overlap_removal.Quadtree)
 
 # Suite only needed for my alltests.py test running master
 def suite():
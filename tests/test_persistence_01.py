@@ -140,6 +140,25 @@ class TestCase_A(unittest.TestCase):
         self.assertFalse(g.persistence.can_I_read(filedata)[0])
         self.assertFalse(g.persistence.UpgradeToLatestFileFormatVersion(filedata))
 
+    def test_7(self):
+        """
+        Records parsed in one go must come out the same as eval'ing each line,
+        whether they take the quick json route or not.
+        """
+        g = Graph()
+        plain = [
+            "# PynSource Version 1.1",
+            "{'type':'meta', 'info1':'Lorem ipsum dolor sit amet, consectetur adipiscing elit.'}",
+            "{'type':'umlshape', 'id':'Log', 'x':-10, 'y':222, 'width':82, 'height':67, 'attrs':'', 'meths':'WriteText'}",
+            "{'type':'edge', 'id':'Log_to_Log', 'source':'Log', 'target':'Log', 'uml_edge_type':'composition'}",
+            ]
+        awkward = plain + ["{'type':'umlshape', 'id':'Quote', 'x':1, 'y':2, 'width':3, 'height':4, 'attrs':\"it's\", 'meths':''}"]
+        for lines in (plain, awkward):
+            expected = [eval(line) for line in lines if line[0] != '#']
+            records = g.persistence.ParseRecords(lines)
+            self.assertEquals(expected, records)
+            self.assertEquals(str, type(records[1]['id']))
+
 def suite():
     suite1 = unittest.makeSuite(TestCase_A, 'test')
     alltests = unittest.TestSuite((suite1, ))
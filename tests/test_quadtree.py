@@ -0,0 +1,72 @@
+import unittest
+import random
+
+import sys
+sys.path.append("../src")
+from layout.quadtree import Quadtree, rects_touch
+
+class SpatialIndexChecks:
+    # Checks every spatial index must pass, mixed into a TestCase which
+    # supplies CreateIndex()
+
+    def setUp(self):
+        rnd = random.Random(1)
+        self.rects = {}
+        for i in range(200):
+            l, t = rnd.randint(0, 1000), rnd.randint(0, 1000)
+            self.rects[i] = (l, t, l + rnd.randint(10, 200), t + rnd.randint(10, 200))
+        self.index = self.CreateIndex()
+        for item, rect in self.rects.items():
+            self.index.Insert(item, rect)
+
+    def _bruteforce(self, rect):
+        return sorted(item for item, itemrect in self.rects.items() if rects_touch(rect, itemrect))
+
+    def _bruteforcepairs(self):
+        items = sorted(self.rects)
+        return [(a, b) for a in items for b in items if a < b and rects_touch(self.rects[a], self.rects[b])]
+
+    def test_1_RetrieveMatchesBruteForce(self):
+        self.assertEqual(200, len(self.index))
+        for rect in self.rects.values() + [(500, 500, 510, 510), (-50, -50, 0, 0), (0, 0, 1200, 1200)]:
+            self.assertEqual(self._bruteforce(rect), sorted(self.index.Retrieve(rect)))
+
+    def test_2_UpdateAndRemove(self):
+        rnd = random.Random(2)
+        for i in range(0, 200, 3):
+            l, t = rnd.randint(-300, 1500), rnd.randint(-300, 1500)     # some end up outside the quadtree root quad
+            self.rects[i] = (l, t, l + 60, t + 60)
+            self.index.Update(i, self.rects[i])
+        for i in range(0, 200, 7):
+            del self.rects[i]
+            self.index.Remove(i)
+        self.assertEqual(len(self.rects), len(self.index))
+        self.assertFalse(0 in self.index)
+        for rect in self.rects.values() + [(-400, -400, 1600, 1600)]:
+            self.assertEqual(self._bruteforce(rect), sorted(self.index.Retrieve(rect)))
+
+    def test_3_Pairs(self):
+        self.assertEqual(self._bruteforcepairs(), sorted(self.index.Pairs()))
+
+    def test_4_Clear(self):
+        self.index.Clear()
+        self.assertEqual(0, len(self.index))
+        self.assertEqual([], self.index.Retrieve((0, 0, 1200, 1200)))
+
+class QuadtreeTests(SpatialIndexChecks, unittest.TestCase):
+
+    def CreateIndex(self):
+        return Quadtree((0, 0, 1200, 1200), capacity=4)
+
+    def test_5_HasSplit(self):
+        self.assertTrue(self.index.children is not None)
+
+
+# Suite only needed for my alltests.py test running master
+def suite():
+    suite1 = unittest.makeSuite(QuadtreeTests, 'test')
+    alltests = unittest.TestSuite((suite1, ))
+    return alltests
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+import sys
+sys.path.append("../src")
+from layout.spatial_grid import SpatialGrid
+from test_quadtree import SpatialIndexChecks
+
+class SpatialGridTests(SpatialIndexChecks, unittest.TestCase):
+
+    def CreateIndex(self):
+        return SpatialGrid(cell=200)
+
+    def test_5_ClearAndReuse(self):
+        cells = self.index.cells
+        self.index.Clear(cell=50)
+        self.assertEqual(50, self.index.cell)
+        self.assertTrue(cells is self.index.cells)
+        self.assertEqual({}, self.index.cells)
+        for item, rect in self.rects.items():
+            self.index.Insert(item, rect)
+        self.assertEqual(self._bruteforcepairs(), sorted(self.index.Pairs()))
+
+
+# Suite only needed for my alltests.py test running master
+def suite():
+    suite1 = unittest.makeSuite(SpatialGridTests, 'test')
+    alltests = unittest.TestSuite((suite1, ))
+    return alltests
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,7 +36,6 @@ class Playhead:
         MaxPosition is -1 when no items in the list we are looking after.
         """
         self.Clear()
-        assert maxitems >= 0
 
         # Add useful behaviour to initial position.        
         if maxitems > 0:
@@ -48,8 +47,7 @@ class Playhead:
         self.MaxPosition = -1
         self._SetMaxItems(0)
     def _ClipPositionToMax(self):
-        if self.Position > self.MaxPosition:
-            self.Position = self.MaxPosition
+        self.Position = min(self.Position, self.MaxPosition)
     def _SetMaxItems(self, maxitems):
         """
         Sets the maximum poisition that the playhead will move over.
@@ -66,15 +64,10 @@ class Playhead:
     def IsEmpty(self):
         return self.MaxPosition <= -1
     def IsMoreToPlay(self):
-        if self.IsEmpty():
-            return 0
-        if self.Position < self.MaxPosition:
-            return 1
-        else:
-            return 0
+        return self.MaxPosition > -1 and self.Position < self.MaxPosition
           
     def NotifyPositionNowValid(self, position):
-        self.NotifyOfInsert(position, noinsertJustValidate=1)
+        self.NotifyOfInsert(position, 1)     # noinsertJustValidate
     def NotifyOfInsert(self, position, noinsertJustValidate=0):
         """
         Says that position 'position' is now valid and has been inserted, pushing all above it (if any) up.
@@ -97,20 +90,22 @@ class Playhead:
         
         assert position >= 0, "Playhead's NotifyOfInsert error, attempt to position to negative value " + str(position)
         
-        wasemptyPlayheadSituation = self.Position == -1 and self.IsEmpty()
+        pos, maxpos = self.Position, self.MaxPosition
+        wasemptyPlayheadSituation = pos == -1 and maxpos <= -1  # i.e. IsEmpty()
         
-        if position > self.MaxPosition:
-            self.MaxPosition = position
+        if position > maxpos:
+            maxpos = position
         else:
             if noinsertJustValidate:
                 pass
             else:
-               if position <= self.Position:
-                   self.Position += 1
-               self.MaxPosition += 1
+               if position <= pos:
+                   self.Position = pos + 1
+               maxpos += 1
+        self.MaxPosition = maxpos
             
         # New extra helpful logic.  Automatically move the playhead to start if now non empty
-        if wasemptyPlayheadSituation and not self.IsEmpty():
+        if wasemptyPlayheadSituation and maxpos > -1:
             self.GoStart()
         
     def GoStart(self):
@@ -126,17 +121,15 @@ class Playhead:
         Jumps playhead to position in the range 0 to maxitems-1
         If are < 0 or > max, then go as far as you can in the intented direction.
         """
-        if position < 0:
-            position = 0
-        if position > self.MaxPosition:
-            position = self.MaxPosition
-        self.Position = position
+        self.Position = min(max(position, 0), self.MaxPosition)
     def GoNext(self):
-        if self.Position < self.MaxPosition:
-            self.Position += 1
+        pos = self.Position
+        if pos < self.MaxPosition:
+            self.Position = pos + 1
     def GoPrevious(self):
-        if self.Position > 0:
-            self.Position -= 1
+        pos = self.Position
+        if pos > 0:
+            self.Position = pos - 1
 
 import unittest, random
 